@@ -1,11 +1,57 @@
-import functools
-import operator
-import copy
+import os
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from itertools import chain
 
 import gmsh
 
 from devicegen.gds_parser import Parser
 
+# Nesting depth of active gmsh_session blocks
+_session_depth = 0
+
+@contextmanager
+def gmsh_session():
+    """ Keep a single gmsh kernel alive over a block of code.
+
+    Initializing gmsh is expensive (OCC kernel allocation, plugin loading),
+    so scripts that generate many devices should wrap the whole sweep in one
+    session so that the kernel is initialized and finalized exactly once:
+
+        with gmsh_session():
+            for params in sweep:
+                dG = DeviceGenerator(...)
+
+    Sessions may be nested; the kernel is finalized when the outermost
+    session exits.
+    """
+    global _session_depth
+    if _session_depth == 0 and not gmsh.isInitialized():
+        gmsh.initialize()
+    _session_depth += 1
+    try:
+        yield
+    finally:
+        _session_depth -= 1
+        if _session_depth == 0 and gmsh.isInitialized():
+            gmsh.finalize()
+
+@dataclass(slots=True)
+class LayerStack:
+    """ Record of the entities lying under a named surface of the layout.
+
+    Attributes:
+    ---
+    surfaces (list of lists): Surface entity tags under the named surface,
+        one list per layer, going from the top of the device down. The first
+        list contains the layout surfaces themselves. Plain tags are stored;
+        the surface dimension (2) is implied.
+    volumes (list of lists): Volume entity tags under the named surface, one
+        list per extruded layer. The volume dimension (3) is implied.
+    """
+    surfaces: list = field(default_factory=list)
+    volumes: list = field(default_factory=list)
+
 class DeviceGenerator:
     """ Class used to generate QTCAD device objects.
 
@@ -19,8 +65,8 @@ class DeviceGenerator:
         physical groups.
     s_counter (int): counter for surfaces created. Used for generatic names of
         physical groups.
-    vol_entities (dictionary): keeps track of volume entities tags under each
-        surface of the layout
+    vol_entities (dictionary): maps each named surface of the layout to a
+        LayerStack keeping track of the surface and volume entities under it
     dot_tag (list of lists of lists): Tags of bottom most surfaces in x-y 
         plane where we expect electrons/holes to be localized. The outer 
         list goes over the different dot regions, the second layer over
@@ -61,12 +107,24 @@ class DeviceGenerator:
     get_surfaces: Get the surfaces under a surface with a given name
     new_top_layer: Generate a top layer and gate.
     """
-    
+
+    # Instances are created in bulk during device sweeps; slots avoid the
+    # per-instance __dict__ and make attribute access a fixed-offset load.
+    __slots__ = (
+        'first_layer', 'bottom_surface', 'top_surface', 'layer_counter',
+        's_counter', 'dot_counter', 'field_counter', 'dot_tag', 'dot_volume',
+        'vol_entities', 'vol_entities_top', 'material_dict', 'bnd_dict',
+        '_size_fields', '_flat_dot_vol', '_phys_name_cache',
+        '_group_ents_cache', '_ent_phys_cache', '_needs_sync',
+        '_mesh_generated', '_top_stale',
+        )
+
     def new_top_layer(
             self, thickness: float, *bnd_params, npts: int=10, 
             surfs_to_extrude: list=None, label: str=None, material=None,
-            pdoping: float=0, ndoping: float=0, bnd_label: str="top", 
-            bnd_type: str=None, color: tuple=None
+            pdoping: float=0, ndoping: float=0, bnd_label: str="top",
+            bnd_type: str=None, color: tuple=None, recombine: bool=False,
+            heights: list=None
             ) -> None:
         """ Generate a top layer and gate.
         
@@ -86,24 +144,40 @@ class DeviceGenerator:
                     Default: 0.
             ndoping (scalar): The density of donors in cm^-3.
                     Default: 0.
-            bnd_label (string): Label for the top of the extruded surface. 
-            bnd_type (string): Type of boundary condition to enforce. The 
+            bnd_label (string): Label for the top of the extruded surface.
+                If None and no boundary condition is given, the top surface
+                is left unlabeled.
+            bnd_type (string): Type of boundary condition to enforce. The
                 possibilities (for QTCAD) are schottky, gate, or ohmic.
             color (tuple): Color with which to identify layer
+            recombine (boolean): If True, recombine the extruded mesh into
+                prisms instead of tetrahedra. Useful for thin uniform slabs,
+                where structured prism layers need far fewer elements.
+            heights (list of scalars): Cumulative normalized heights (between
+                0 and 1) of the element layers along the extrusion, for
+                non-uniform layers. When given, npts may be a list with one
+                entry per element layer. If None, elements are spread
+                uniformly.
         """
-        
-        # Establish which surfaces need to be extruded 
+
+        self._ensure_top_layer()
+
+        # Establish which surfaces need to be extruded
         # (those that have no associated boundary conditions)
         if surfs_to_extrude is None:
             surfs_to_extrude = self.top_surface
         else:
-            surfs_to_extrude = self.get_ent_tag_from_name(surfs_to_extrude)
-            surfs_to_extrude = [(2, ent) for ent in surfs_to_extrude]
+            surfs_to_extrude = self.get_ent_tag_from_name(surfs_to_extrude,
+                as_dimtags=True)
 
         # Perform the extrude operation
-        extr_surf = gmsh.model.occ.extrude(surfs_to_extrude, 0, 0, thickness, numElements=[npts])
-        gmsh.model.occ.synchronize()  
-        
+        num_elements = npts if isinstance(npts, list) else [npts]
+        extr_surf = gmsh.model.occ.extrude(surfs_to_extrude, 0, 0, thickness,
+            numElements=num_elements,
+            heights=heights if heights is not None else [],
+            recombine=recombine)
+        self._needs_sync = True
+
         # Add a physical name to the generated volume.
         # Get the generated volumes
         V = [e[1] for e in extr_surf if e[0]==3] # Volumes generated from extrusion
@@ -114,18 +188,19 @@ class DeviceGenerator:
         
         self.label_volume(V, label, material, pdoping, ndoping)
         
-        # Add a physical name for top gate.
-        surfs = [e[1] for e in self.track_surface(extr_surf)]
-        self.label_surface(surfs, bnd_label, bnd_type, *bnd_params)
+        # Add a physical name for top gate. Skipped entirely when the caller
+        # passes bnd_label=None with no boundary condition, since labeling an
+        # internal cap that carries no condition is pure overhead.
+        if bnd_label is not None or bnd_type is not None or bnd_params:
+            surfs = [e[1] for e in self.track_surface(extr_surf)]
+            self.label_surface(surfs, bnd_label, bnd_type, *bnd_params)
         
         # Color layer if required
         V = [(3, v) for v in V]
         if color is not None:
             gmsh.model.setColor(V, color[0], color[1], color[2])
 
-        gmsh.model.occ.synchronize()
 
-    
     def label_bottom(self, label: str, *bnd_params, bnd_type: str=None) -> None:
         """ Label the bottom surface of the device
 
@@ -142,11 +217,11 @@ class DeviceGenerator:
             raise ValueError("This is the first layer, not the bottom!")
         
         # Label the bottom surface
+        self._synchronize()
         tags = [tag[1] for tag in self.bottom_surface]
         physical_surface = gmsh.model.addPhysicalGroup(2, tags, tag=-1)
         gmsh.model.setPhysicalName(2, physical_surface, label)
-
-        gmsh.model.occ.synchronize()
+        self._invalidate_phys_cache()
 
         # Storing boundary condition
         self.store_bnd_conditions(label, bnd_type, *bnd_params)
@@ -219,36 +294,48 @@ class DeviceGenerator:
         Returns:
             (int): Physical tag of the new physical group.
         """
+        self._ensure_top_layer()
+        self._synchronize()
+
+        # Group the entities to relabel by the physical group they currently
+        # belong to, so that each affected group is queried and removed once
+        # rather than once per entity
+        ent_to_phys = self._entity_phys_map(dim)
+        phys_groups = {}
         for tag in ent_tags:
             # Get the pysical group
-            phys_tags = gmsh.model.getPhysicalGroupsForEntity(dim, tag)
-            if len(phys_tags) != 0:
-                phys_tag = phys_tags[0]
-                # Get entites of this physical group
-                ent_list = gmsh.model.getEntitiesForPhysicalGroup(dim, phys_tag)
-                # Remove name and phyiscal group
-                name = gmsh.model.getPhysicalName(dim, phys_tag)
-                gmsh.model.removePhysicalGroups([(dim,phys_tag)])
-                gmsh.model.removePhysicalName(name)
-                gmsh.model.occ.synchronize()
-
-                # Remove the entity of interest from the list
-                ent_list = list(ent_list)
-                ent_list.remove(tag)
-                # If we are not using the name and the there are entities left
-                if (name != new_name) and ent_list != []: 
-                    # Give back name to remaining entities 
-                    phys_group = gmsh.model.addPhysicalGroup(dim, ent_list)
-                    gmsh.model.setPhysicalName(dim, phys_group, name)
-                else:
-                    m=f'Warning new name {new_name} already in use'
-                    if verbose:
-                        print(m)
+            phys_tag = ent_to_phys.get(tag)
+            if phys_tag is not None:
+                phys_groups.setdefault(phys_tag, []).append(tag)
+
+        # When none of the entities are already labelled (the common case for
+        # freshly extruded volumes), this loop is skipped and the method
+        # reduces to the single addPhysicalGroup/setPhysicalName pair below.
+        ent_tags_set = set(ent_tags) if phys_groups else None
+        for phys_tag in phys_groups:
+            # Get entites of this physical group
+            ent_list = gmsh.model.getEntitiesForPhysicalGroup(dim, phys_tag)
+            # Remove name and phyiscal group
+            name = gmsh.model.getPhysicalName(dim, phys_tag)
+            gmsh.model.removePhysicalGroups([(dim,phys_tag)])
+            gmsh.model.removePhysicalName(name)
+
+            # Remove the entities being relabelled from the list
+            ent_list = [e for e in ent_list if e not in ent_tags_set]
+            # If we are not using the name and the there are entities left
+            if (name != new_name) and ent_list != []:
+                # Give back name to remaining entities
+                phys_group = gmsh.model.addPhysicalGroup(dim, ent_list)
+                gmsh.model.setPhysicalName(dim, phys_group, name)
+            else:
+                m=f'Warning new name {new_name} already in use'
+                if verbose:
+                    print(m)
 
         # Give new name to phys_group
         new_phys_group = gmsh.model.addPhysicalGroup(dim, ent_tags)
         gmsh.model.setPhysicalName(dim, new_phys_group, new_name)
-        gmsh.model.occ.synchronize()
+        self._invalidate_phys_cache()
 
         return new_phys_group
 
@@ -261,13 +348,25 @@ class DeviceGenerator:
         gmsh.model.mesh.field.add("Min", field_tag)
         gmsh.model.mesh.field.setNumbers(field_tag,
                                          "FieldsList",
-                                         [i for i in range(1, field_tag)])
+                                         self._size_fields)
         # Apply the min field
         gmsh.model.mesh.field.setAsBackgroundMesh(field_tag)
 
         # Update counter
         self.field_counter+=1
 
+    def _set_field_params(self, field_tag: int, params: dict) -> None:
+        """ Set scalar parameters of a mesh field from a dictionary.
+
+        Args:
+            field_tag (int): tag of the mesh field.
+            params (dictionary): Map from field option names to the numeric
+                values to set.
+        """
+        set_number = gmsh.model.mesh.field.setNumber
+        for option, value in params.items():
+            set_number(field_tag, option, value)
+
     def new_box_field(
             self, xmin: float, xmax: float, ymin: float, ymax: float,
             VIn: float, VOut: float=None
@@ -282,24 +381,20 @@ class DeviceGenerator:
             ymin (scalar): minimal y value of box.
             ymax (scalar): maximal y value of box.
         """
-        # Clear any meshes already present
-        gmsh.model.mesh.clear(dimTags=[])
-
         # Create Box field
         gmsh.model.mesh.field.add("Box", self.field_counter)
-        gmsh.model.mesh.field.setNumber(self.field_counter, "VIn", VIn)
-        gmsh.model.mesh.field.setNumber(self.field_counter, "XMin", xmin)
-        gmsh.model.mesh.field.setNumber(self.field_counter, "XMax", xmax)
-        gmsh.model.mesh.field.setNumber(self.field_counter, "YMin", ymin)
-        gmsh.model.mesh.field.setNumber(self.field_counter, "YMax", ymax)
+        params = {
+            "VIn": VIn, "XMin": xmin, "XMax": xmax, "YMin": ymin, "YMax": ymax
+            }
         if VOut is not None:
-            gmsh.model.mesh.field.setNumber(self.field_counter, "VOut", VOut)
+            params["VOut"] = VOut
+        self._set_field_params(self.field_counter, params)
 
         gmsh.model.mesh.field.setAsBackgroundMesh(self.field_counter)
+        # Keep track of size-producing fields for min_field
+        self._size_fields.append(self.field_counter)
         # Increase field count
         self.field_counter += 1
-        # Synchronize
-        gmsh.model.occ.synchronize()
 
     def new_constant_field(
             self, surfs_list: list, VIn: float, VOut: float=None
@@ -312,28 +407,32 @@ class DeviceGenerator:
             VIn (scalar): characteristic length of field inside surfaces.
             VOut (scalar): characteristic length of field outside surfaces.
         """
-        # Clear any meshes already present
-        gmsh.model.mesh.clear(dimTags=[])
+        # Clear any meshes already present. Skipped until a mesh has actually
+        # been generated, which is the common case during device setup.
+        if self._mesh_generated:
+            gmsh.model.mesh.clear(dimTags=[])
 
         # Create constant field
         gmsh.model.mesh.field.add("Constant", self.field_counter)
-        gmsh.model.mesh.field.setNumber(self.field_counter, "VIn", VIn)
-        gmsh.model.mesh.field.setNumbers(self.field_counter, "SurfacesList", 
-            surfs_list)
+        params = {"VIn": VIn}
         if VOut is not None:
-            gmsh.model.mesh.field.setNumber(self.field_counter, "VOut", VOut)
+            params["VOut"] = VOut
+        self._set_field_params(self.field_counter, params)
+        gmsh.model.mesh.field.setNumbers(self.field_counter, "SurfacesList",
+            surfs_list)
 
         gmsh.model.mesh.field.setAsBackgroundMesh(self.field_counter)
+        # Keep track of size-producing fields for min_field
+        self._size_fields.append(self.field_counter)
         # Increase field count
         self.field_counter += 1
-        # Synchronize
-        gmsh.model.occ.synchronize()
 
     def new_layer(
             self, thickness: float, npts: int=10, label: str=None, 
             dot_region: bool=False, dot_label: str=None, material=None,
             pdoping: float=0, ndoping: float=0, label_sides: bool=False,
-            color: tuple=None
+            sides_group: bool=False, color: tuple=None, recombine: bool=False,
+            heights: list=None
             ) -> None:
         """ Creates a layer by extruding the bottom-most surface.
 
@@ -355,48 +454,67 @@ class DeviceGenerator:
                     Default: 0.
             label_sides (boolean): Whether to label the sides surfaces resulting
                 from the extrusion.
+            sides_group (boolean): If True, gather all labelled side surfaces
+                into a single physical group instead of one group per surface.
+                Only relevant when label_sides is True.
             color (tuple): Color with which to identify layer
+            recombine (boolean): If True, recombine the extruded mesh into
+                prisms instead of tetrahedra.
+            heights (list of scalars): Cumulative normalized heights (between
+                0 and 1) of the element layers along the extrusion, for
+                non-uniform layers. When given, npts may be a list with one
+                entry per element layer. If None, elements are spread
+                uniformly.
         """
 
+        self._ensure_top_layer()
+
         self.first_layer = False
         surf_to_extrude = self.bottom_surface
 
-        extr_surf = gmsh.model.occ.extrude(surf_to_extrude, 0, 0, -thickness, numElements=[npts])
+        num_elements = npts if isinstance(npts, list) else [npts]
+        extr_surf = gmsh.model.occ.extrude(surf_to_extrude, 0, 0, -thickness,
+            numElements=num_elements,
+            heights=heights if heights is not None else [],
+            recombine=recombine)
+        self._needs_sync = True
+
+        # Volumes generated from extrusion and entity-to-index map, computed
+        # once and shared with the bookkeeping helpers
+        V = [e for e in extr_surf if e[0]==3]
+        extr_idx = {dt: i for i, dt in enumerate(extr_surf)}
 
         if label_sides: # label side surfaces
-            self.label_sides(extr_surf)
+            self.label_sides(extr_surf, group=sides_group)
 
         # Update attribute vol_entities.
-        self._update_vol_entities(surf_to_extrude, extr_surf, self.vol_entities)
+        self._update_vol_entities(surf_to_extrude, extr_surf, self.vol_entities,
+            V=V, extr_idx=extr_idx)
 
         # keep track of bottom surfaces in case an additional layer is added
         self.bottom_surface = self.track_surface(extr_surf)
         # Update regions related to dots
-        self._update_dot_vol(self.dot_tag, self.dot_volume, extr_surf, dot_region, 
-            label=dot_label, material=material, pdoping=pdoping, ndoping=ndoping)
-
-        # Tags of all volumes part of dot volume
-        def flatten(l):
-            """Flattens a list of lists"""
-            return functools.reduce(operator.iconcat, l, [])
-        flat_dot_vol = flatten(flatten(self.dot_volume))
+        self._update_dot_vol(self.dot_tag, self.dot_volume, surf_to_extrude,
+            extr_surf, dot_region,
+            label=dot_label, material=material, pdoping=pdoping, ndoping=ndoping,
+            V=V, extr_idx=extr_idx)
 
         # Check which are not part of dot volumes
-        V = [e for e in extr_surf if e[0]==3] # Volumes generated from extrusion
-        volumes = [vol[1] for vol in V if vol[1] not in flat_dot_vol]
+        volumes = [vol[1] for vol in V if vol[1] not in self._flat_dot_vol]
+
+        self._synchronize()
 
         # Color layer if required
         if color is not None:
             gmsh.model.setColor(V, color[0], color[1], color[2])
 
-        gmsh.model.occ.synchronize()  
-
         # Add a physical name.
         physical_volume = gmsh.model.addPhysicalGroup(3, volumes, tag=-1)
 
         if label is None: # generic name
             label=f'volume{self.layer_counter}'
         gmsh.model.setPhysicalName(3, physical_volume, label)
+        self._invalidate_phys_cache()
         self.layer_counter += 1
 
         phys_tags = self.get_tag_from_name(label, dim=3)
@@ -415,44 +533,77 @@ class DeviceGenerator:
 
             physical_volu = gmsh.model.addPhysicalGroup(3, tags)
             gmsh.model.setPhysicalName(3, physical_volu, label)
-        
+            self._invalidate_phys_cache()
+
         # Store material properties
         self.store_mat_properties(label, material, pdoping, ndoping)
 
-        gmsh.model.occ.synchronize()  
+    def new_layers(self, layers: list) -> None:
+        """ Creates several layers in a single call.
+
+        Convenience wrapper around new_layer for building a full
+        heterostructure stack at once, e.g.
 
-    def label_sides(self, extr_surf: list) -> None:
+            dG.new_layers([
+                dict(thickness=10e-3, npts=5, label='cap'),
+                dict(thickness=25e-3, npts=10, label='barrier'),
+                ])
+
+        Args:
+            layers (list of dictionaries): one dictionary of new_layer
+                keyword arguments per layer, ordered from the top of the
+                stack down. Each must at least contain 'thickness'.
+        """
+        for spec in layers:
+            self.new_layer(**spec)
+
+    def label_sides(self, extr_surf: list, group: bool=False) -> None:
         """ Label side surfaces generated by an extrusion
 
         Args:
-            extr_surf (list of tuples): output of gmsh.model.occ.extrude call 
+            extr_surf (list of tuples): output of gmsh.model.occ.extrude call
                 for which we want to label the side surfaces.
+            group (boolean): If True, gather all side surfaces into a single
+                physical group instead of one group per surface. Cuts the
+                number of gmsh calls and physical names when the sides do not
+                need to be addressed individually.
         """
-        # Find indices that contain volumes
-        vol_index = []
-        for i in range(len(extr_surf)):
-            if extr_surf[i][0] == 3:
-                vol_index.append(i)
-        
-        # Find all the "side" surfaces 
-        side_surf = []
-        for i in range(len(vol_index)-1):
-            j = vol_index[i]
-            k = vol_index[i+1]
-            side_surf += extr_surf[j+1:k-1]
-        side_surf += extr_surf[vol_index[-1] + 1:]
-        # keep only unique surfaces
-        side_surf = list(set(side_surf))
+        self._synchronize()
+        # Collect the "side" surfaces in a single pass. For each extruded
+        # surface, gmsh returns the opposite face, then the volume, then the
+        # side faces, so the sides are the entries following a volume except
+        # for the entry that immediately precedes the next volume (the next
+        # opposite face). A dict keeps the surfaces unique while preserving
+        # encounter order, so the generic surf names are stable across runs.
+        side_surf = {}
+        prev = None
+        past_first_vol = False
+        for e in extr_surf:
+            if e[0] == 3:
+                side_surf.pop(prev, None)
+                past_first_vol = True
+            elif past_first_vol:
+                side_surf[e] = None
+            prev = e
         
-        # Loop over all entities and assign a generic name: 'surf1', 'surf2', ...
-        for e in side_surf:
+        if group:
+            # All sides share a single generic name
             name = f'surf{self.s_counter}'
-            phys_surf = gmsh.model.addPhysicalGroup(2, [e[1]])
+            phys_surf = gmsh.model.addPhysicalGroup(2, [e[1] for e in side_surf])
             gmsh.model.setPhysicalName(2, phys_surf, name)
-
             self.s_counter += 1
-            gmsh.model.occ.synchronize()
-
+        else:
+            # Assign a generic name to each entity: 'surf1', 'surf2', ...
+            # All names are generated up front so the gmsh calls run
+            # back-to-back
+            names = [f'surf{i}' for i in
+                range(self.s_counter, self.s_counter + len(side_surf))]
+            self.s_counter += len(side_surf)
+            for e, name in zip(side_surf, names):
+                phys_surf = gmsh.model.addPhysicalGroup(2, [e[1]])
+                gmsh.model.setPhysicalName(2, phys_surf, name)
+
+        self._invalidate_phys_cache()
 
     def get_volumes(self, name: str, layer=None) -> list:
         """ Get the volumes under a surface with a given name
@@ -465,17 +616,18 @@ class DeviceGenerator:
         Returns:
             (list): List of volume entity tags.
         """
+        self._ensure_top_layer()
         # Entitity tags for a certain surface naem
-        ents = self.vol_entities[name][1::2]
+        ents = self.vol_entities[name].volumes
         # If layer is specified, get volumes for a specific layer
         if layer is not None:
             ents = ents[layer]
-        # If layer is unspecified get all volumes. 
+        # If layer is unspecified get all volumes.
         if layer is None:
-            ents = [item for sublist in ents for item in sublist]
-            
-        return [e[1] for e in ents]
-      
+            ents = chain.from_iterable(ents)
+
+        return list(ents)
+
     def get_surfaces(self, name: str, layer=None) -> list:
         """ Get the surfaces under a surface with a given name
         
@@ -491,76 +643,93 @@ class DeviceGenerator:
         Note:
             If layer = 0 then the output is the surfaces named name.     
         """
+        self._ensure_top_layer()
         # Entitity tags for a certain surface name
-        ents = self.vol_entities[name][0::2]
+        ents = self.vol_entities[name].surfaces
         # If layer is specified, get volumes for a specific layer
         if layer is not None:
             ents = ents[layer]
-        # If layer is unspecified get all volumes. 
+        # If layer is unspecified get all volumes.
         if layer is None:
-            ents = [item for sublist in ents for item in sublist]
-            
-        return [e[1] for e in ents]
+            ents = chain.from_iterable(ents)
+
+        return list(ents)
 
     def _update_vol_entities(
-            self, surf_to_extr: list, extr_surf: list, vol_entities: dict
+            self, surf_to_extr: list, extr_surf: list, vol_entities: dict,
+            V: list=None, extr_idx: dict=None
             ) -> None:
         """ Update attribute vol_entities to include the volumes and surfaces
         generate by creating a new layer.
-        
+
         Args:
             surf_to_extr (list): List of surface entities that are extruded.
-            extr_surf (list): List of entities generated by the extrusion in 
+            extr_surf (list): List of entities generated by the extrusion in
                 the method new_layer.
             vol_entities (dictionary): Dictionary keeping track of volumes.
-        
-        """
-        vols = [e for e in extr_surf if e[0] == 3]
+            V (list): Volume entities contained in extr_surf. Computed if
+                not provided.
+            extr_idx (dictionary): Map from entities of extr_surf to their
+                index. Computed if not provided.
 
-        for key in vol_entities:
+        """
+        if V is None:
+            V = [e for e in extr_surf if e[0] == 3]
+        if extr_idx is None:
+            extr_idx = {dt: i for i, dt in enumerate(extr_surf)}
+        vols = V
+        # Map from extruded surface tag to index, to avoid repeated linear
+        # scans. The stacks store plain tags; the dimension is implied.
+        src_idx = {dt[1]: i for i, dt in enumerate(surf_to_extr)}
+
+        for stack in vol_entities.values():
             # Get the bottom-most surface for key
-            surfs = vol_entities[key][-1]
+            surfs = stack.surfaces[-1]
             # Create a list of volumes under the surface with physical name
             # given by the key
             vol_list = []
             for s in surfs:
-                id = surf_to_extr.index(s)
-                vol_list.append(vols[id])
-                # Update attribute
-            vol_entities[key] = vol_entities[key] + [vol_list]
+                id = src_idx[s]
+                vol_list.append(vols[id][1])
+            # Update attribute
+            stack.volumes.append(vol_list)
 
-            # Get the bottom-most volume for key
-            new_vols = vol_entities[key][-1]
             # Create a list of the surfaces generated by the extrude under the
             # surface with physical name given by the key
             new_surfs = []
-            for v in new_vols:
-                id = extr_surf.index(v) - 1
-                new_surfs.append(extr_surf[id])
+            for v in vol_list:
+                id = extr_idx[(3, v)] - 1
+                new_surfs.append(extr_surf[id][1])
             # Update attribute
-            vol_entities[key] = vol_entities[key] + [new_surfs]
+            stack.surfaces.append(new_surfs)
     
 
     def track_surface(self, extr_surf: list) -> list:
         """ Keep track of surface entities.
-        
+
         Args:
             extr_surf (list): Entities created by an extrusion.
         Returns
             (list): List of surfaces create by an extrusion.
         """
+        # The extrusion output lists, for each extruded surface, the opposite
+        # face immediately followed by the new volume (and then the side
+        # faces), so the surface paired with each volume is the entry that
+        # precedes it; a single pass reads them all off.
         surface = []
-        # Volumes generated from extrusion
-        V = [e for e in extr_surf if e[0]==3] 
-        for v in V:
-            id_vol = extr_surf.index(v)
-            surface.append(extr_surf[id_vol - 1] )
+        prev = None
+        for e in extr_surf:
+            if e[0] == 3:
+                surface.append(prev)
+            prev = e
         return surface
 
 
     def _update_dot_vol(
-            self, dot_tags: list, dot_volume: list, extr_surf: list, dot_region: bool, label=None,
-            material=None, pdoping: float=0, ndoping: float=0
+            self, dot_tags: list, dot_volume: list, surf_to_extr: list,
+            extr_surf: list, dot_region: bool, label=None,
+            material=None, pdoping: float=0, ndoping: float=0,
+            V: list=None, extr_idx: dict=None
             ) -> None:
         """ Updates the attributes dot_volume and dot_tag and labels dot region.
         Args:
@@ -568,7 +737,7 @@ class DeviceGenerator:
                 electrons/holes to be localized.
             dot_volume (list): Tags of the different volumes that we expect
                 to contain dots.
-            surf_to_extrude (list of gmsh entities): list of surfaces that are extruded.
+            surf_to_extr (list of gmsh entities): list of surfaces that are extruded.
             extr_surf (list of gmsh entities): entities created from gmsh's extrusion 
                 operation
             dot_region (boolean): If true, the attribute dot_volume is modified.
@@ -583,26 +752,36 @@ class DeviceGenerator:
                     Default: 0.
             ndoping (scalar): The density of donors in cm^-3.
                     Default: 0.
+            V (list): Volume entities contained in extr_surf. Computed if
+                not provided.
+            extr_idx (dictionary): Map from entities of extr_surf to their
+                index. Computed if not provided.
         """
-        gmsh.model.occ.synchronize()
-        # Convert label to a list if it is a string.  
+        # Convert label to a list if it is a string.
         if isinstance(label, str):
             label = [label]
 
+        self._synchronize()
+
+        if extr_idx is None:
+            # Map from entity to index, to avoid repeated linear list scans
+            extr_idx = {dt: i for i, dt in enumerate(extr_surf)}
+        if V is None:
+            # All volumes created by the extrusion
+            V = [e for e in extr_surf if e[0]==3]
+
+        # The extrusion output contains one volume per extruded surface, in
+        # the order of surf_to_extr, so the volume created under each dot
+        # surface can be read off directly without querying boundaries
+        vols_below = {s[1]: V[j] for j, s in enumerate(surf_to_extr)}
+
         # loop over all entites tagged created by the create_dot_rectangle() method
-        for i, dot in enumerate(dot_tags): 
-            
+        for i, dot in enumerate(dot_tags):
+
             # Find volumes corresponding to dot region
-            V = [e for e in extr_surf if e[0]==3] # All volumes created
             dot_below = dot[-1] # Entity tags for bottom most surfaces of dot
-            vol_indices = []
-            for v in V: 
-                # Check if the dot surface is a boundary of the dot volume
-                set_dot_below = set([(2, t) for t in dot_below])
-                bndry_of_v = set(gmsh.model.getBoundary([v], oriented=False))
-                intersection = set.intersection(set_dot_below, bndry_of_v)
-                if len(list(intersection)) != 0:
-                    vol_indices.append(extr_surf.index(v))
+            vol_indices = [
+                extr_idx[vols_below[t]] for t in dot_below if t in vols_below]
             
             # Find bottom surface of volume
             # update dot_tags
@@ -612,6 +791,7 @@ class DeviceGenerator:
                 # Include the create volume in the dot volumes
                 vols = [extr_surf[ix][1] for ix in vol_indices]
                 dot_volume[i].append(vols)
+                self._flat_dot_vol.update(vols)
 
                 if label is None:
                     dot_label = f'dot{i}-{self.layer_counter}'
@@ -620,83 +800,207 @@ class DeviceGenerator:
                 # Add a physical name.
                 phys_volume = gmsh.model.addPhysicalGroup(3, vols, tag=-1)
                 gmsh.model.setPhysicalName(3, phys_volume, dot_label)
+                self._invalidate_phys_cache()
                 
                 # Store material properties
                 self.store_mat_properties(dot_label, material, pdoping, ndoping)
                        
+    def _phys_name_map(self, dim: int) -> dict:
+        """ Get a map from physical names to physical tags for a given
+        dimension. The map is cached so that repeated name lookups do not
+        rescan all physical groups; methods that add, remove, or rename
+        physical groups invalidate the cache.
+
+        Args:
+            dim (int): dimension of the physical groups to map.
+
+        Returns:
+            (dictionary): Map from physical names to physical tags.
+        """
+        name_map = self._phys_name_cache.get(dim)
+        if name_map is None:
+            # When several groups share a name, keep the lowest tag, matching
+            # the break-on-first-match semantics of a scan over
+            # getPhysicalGroups (new_layer relies on this when merging
+            # duplicate layer labels)
+            name_map = {}
+            for tag in gmsh.model.getPhysicalGroups(dim=dim):
+                name_map.setdefault(gmsh.model.getPhysicalName(dim, tag[1]),
+                    tag[1])
+            self._phys_name_cache[dim] = name_map
+        return name_map
+
+    def _ents_for_group(self, dim: int, phys_tag: int) -> list:
+        """ Get the entity tags of a physical group. The result is cached so
+        that chained operations consulting the same group do not re-query
+        gmsh; the cache is dropped whenever physical groups change.
+
+        Args:
+            dim (int): dimension of the physical group.
+            phys_tag (int): tag of the physical group.
+
+        Returns:
+            (list): Entity tags of the physical group.
+        """
+        key = (dim, phys_tag)
+        ents = self._group_ents_cache.get(key)
+        if ents is None:
+            ents = list(gmsh.model.getEntitiesForPhysicalGroup(dim, phys_tag))
+            self._group_ents_cache[key] = ents
+        return ents
+
+    def _entity_phys_map(self, dim: int) -> dict:
+        """ Get a map from entity tags to the physical group containing them
+        for a given dimension. Built by expanding each physical group once
+        instead of querying gmsh per entity; when an entity belongs to
+        several groups, the one with the lowest tag wins, matching the first
+        entry returned by getPhysicalGroupsForEntity. Cached and invalidated
+        together with the other physical-group lookups.
+
+        Args:
+            dim (int): dimension of the entities to map.
+
+        Returns:
+            (dictionary): Map from entity tags to physical tags.
+        """
+        ent_map = self._ent_phys_cache.get(dim)
+        if ent_map is None:
+            ent_map = {}
+            for phys_tag in sorted(self._phys_name_map(dim).values()):
+                for ent in self._ents_for_group(dim, phys_tag):
+                    ent_map.setdefault(ent, phys_tag)
+            self._ent_phys_cache[dim] = ent_map
+        return ent_map
+
+    def _invalidate_phys_cache(self) -> None:
+        """ Drop cached physical-group lookups. Called whenever physical
+        groups are added, removed, or renamed.
+        """
+        self._phys_name_cache.clear()
+        self._group_ents_cache.clear()
+        self._ent_phys_cache.clear()
+
+    def _ensure_top_layer(self) -> None:
+        """ Rebuild the top layer if dot rectangles were added since the last
+        setup. The rebuild is deferred so that consecutive new_dot_rectangle
+        calls pay for a single fragmentation instead of one each.
+        """
+        if self._top_stale:
+            self._top_stale = False
+            self.setup_top_layer()
+
+    def _synchronize(self) -> None:
+        """ Synchronize the gmsh model with the OCC representation, but only
+        if a geometry-modifying call was made since the last synchronization.
+        The cost of synchronize grows with the total number of model entities,
+        so skipping redundant calls matters as the device stack grows.
+        """
+        if self._needs_sync:
+            gmsh.model.occ.synchronize()
+            self._needs_sync = False
+
+    def _get_phys_tags(self, names: list, dim: int) -> list:
+        """ Get the physical tags associated with a list of physical names.
+        Internal variant of get_tag_from_name that always takes and returns
+        a list, so chained lookups avoid the single-name type juggling.
+
+        Args:
+            names (list of strings): Names for which we want the physical
+                tags.
+            dim (int): dimension of the physical groups.
+
+        Returns:
+            (list of ints): Physical tags associated with the names.
+        """
+        name_to_tag = self._phys_name_map(dim)
+        return [name_to_tag[N] for N in names if N in name_to_tag]
+
     def get_tag_from_name(self, name: str, dim: int=2) -> None:
         """ Get the physical tags associated with a physical name.
-        
+
         Args:
-            name (string or list of strings): Names for which we want the 
+            name (string or list of strings): Names for which we want the
                 physical tags.
 
         Returns:
-            (int or list of ints): Physical tags associated with the 
+            (int or list of ints): Physical tags associated with the
                 physical names.
         """
-        # Check if input is a string or a list
-        single = False
+        self._ensure_top_layer()
+        # If input is a single string, output a single int
         if isinstance(name, str):
-            name  = [name]
-            single = True
+            return self._get_phys_tags([name], dim)[0]
+        return self._get_phys_tags(name, dim)
 
-        # Get tags associated with each name
-        tags = []
-        for N in name:
-            for tag in gmsh.model.getPhysicalGroups(dim=dim):
-                if N == gmsh.model.getPhysicalName(dim, tag[1]):
-                    tags.append(tag[1])
-                    break
-        
-        # If input was a single string output a single int
-        if single:
-            return tags[0]
-        else:
-            return tags
-    
-    def get_ent_tag_from_name(self, name: str, dim: int=2) -> None:
+    def get_ent_tag_from_name(
+            self, name: str, dim: int=2, as_dimtags: bool=False
+            ) -> None:
         """ Get the entity tags associated with a physical name.
-        
+
         Args:
-            name (string or list of strings): Names for which we want the 
+            name (string or list of strings): Names for which we want the
                 entity tags.
+            as_dimtags (boolean): If True, return (dim, tag) tuples as
+                expected by the gmsh geometry calls instead of bare tags.
 
         Returns:
-            (int or list of ints): Entity tags associated with the 
+            (int or list of ints): Entity tags associated with the
                 physical names.
         """
+        self._ensure_top_layer()
         # Get physical tags from name
-        phys_tag = self.get_tag_from_name(name, dim)
-
-        if isinstance(phys_tag, int):
-            phys_tag = [phys_tag]
+        phys_tags = self._get_phys_tags([name] if isinstance(name, str)
+            else name, dim)
         # Get entity tags from physical tags
         ent_tag = []
-        for tag in phys_tag:
-            ent_tag += list(gmsh.model.getEntitiesForPhysicalGroup(dim,tag))
+        for tag in phys_tags:
+            ent_tag += self._ents_for_group(dim, tag)
 
+        if as_dimtags:
+            return [(dim, tag) for tag in ent_tag]
         return ent_tag
 
 
     def save_mesh(
-            self, dim: int=3, mesh_name: str='mesh.msh2', order: int=1
+            self, dim: int=3, mesh_name: str='mesh.msh2', order: int=1,
+            num_threads: int=None, binary: bool=False
             ) -> None:
         """ Saves the generated mesh.
-        
+
         Args:
             dim (1, 2, or 3): dimension of the mesh to generate.
-            mesh_name (string): name of output mesh. The extension will 
+            mesh_name (string): name of output mesh. The extension will
                 determine the mesh file type. QTCAD currently supports .msh2
-            order (1 or 2, optional): Order of the Lagrange interpolation to be 
+            order (1 or 2, optional): Order of the Lagrange interpolation to be
                 used on the mesh. Default: 1.
+            num_threads (int, optional): Number of threads used by the gmsh
+                meshers. Defaults to the number of available cores.
+            binary (boolean): If True, write the mesh in the binary variant of
+                the chosen format, which is much smaller and faster to write
+                than ASCII for large meshes. Defaults to False since QTCAD
+                reads ASCII .msh2 files.
         """
         if order not in [1,2]:
             raise ValueError("Mesh order must be 1 or 2.")
+        # Use gmsh's multi-threaded meshers
+        if num_threads is None:
+            num_threads = os.cpu_count() or 1
+        gmsh.option.setNumber("General.NumThreads", num_threads)
+        gmsh.option.setNumber("Mesh.MaxNumThreads1D", num_threads)
+        gmsh.option.setNumber("Mesh.MaxNumThreads2D", num_threads)
+        gmsh.option.setNumber("Mesh.MaxNumThreads3D", num_threads)
+        # Push any pending geometry changes to the model before meshing
+        self._ensure_top_layer()
+        self._synchronize()
+        # Clear any meshes already present
+        if self._mesh_generated:
+            gmsh.model.mesh.clear(dimTags=[])
         # Create the mesh
         for i in range(dim):
             gmsh.model.mesh.generate(dim=i+1)
+        self._mesh_generated = True
         gmsh.model.mesh.setOrder(order)
+        gmsh.option.setNumber("Mesh.Binary", 1 if binary else 0)
         gmsh.write(mesh_name)
 
     def save_geo(self, geo_name: str='geometry.geo_unrolled') -> None:
@@ -707,6 +1011,8 @@ class DeviceGenerator:
                 .geo_unrolled
         """
         # Create the geo file
+        self._ensure_top_layer()
+        self._synchronize()
         gmsh.write(geo_name)
 
 
@@ -731,18 +1037,22 @@ class DeviceGenerator:
                 name
         """
 
+        self._ensure_top_layer()
+
         # If no new_label provided, remove physical groups
         if new_label is None:
             self.remove_phys_groups(old_label)
 
         else:
-            # Get physical tags
-            phys_tags = self.get_tag_from_name(old_label)
-            if isinstance(phys_tags, int):
-                phys_tags = [phys_tags]
-
-            # Get entity tags
-            ent_tags = self.get_ent_tag_from_name(old_label)
+            # Get physical and entity tags. For the common single-label case,
+            # resolve the physical tag once and query its entities directly
+            # instead of going through a second name lookup.
+            if isinstance(old_label, str):
+                phys_tags = [self.get_tag_from_name(old_label)]
+                ent_tags = list(self._ents_for_group(2, phys_tags[0]))
+            else:
+                phys_tags = self.get_tag_from_name(old_label)
+                ent_tags = self.get_ent_tag_from_name(old_label)
 
             # Destroying the old physical group
             phys_tags = [(2, pt) for pt in phys_tags]
@@ -750,24 +1060,35 @@ class DeviceGenerator:
             # Creating the new one
             physical_surface = gmsh.model.addPhysicalGroup(2, ent_tags)
             gmsh.model.setPhysicalName(2, physical_surface, new_label)
-            
-            gmsh.model.occ.synchronize()
+            self._invalidate_phys_cache()
 
             # Storing boundary conditions
             self.store_bnd_conditions(new_label, bnd_type, *bnd_params)
 
-            # Update top_surface attribute
-            for tag in ent_tags:
-                try:
-                    self.top_surface.remove((2, tag))
-                except:
-                    pass
+            # Update top_surface attribute. A single filtering pass replaces
+            # one O(len(top_surface)) list.remove per relabelled entity.
+            removed = {(2, tag) for tag in ent_tags}
+            self.top_surface = [s for s in self.top_surface if s not in removed]
         
         # update attribute vol_entities
         self._update_vol_entity_keys(ent_tags, old_label, new_label)
 
         return ent_tags
 
+    def relabel_surfaces(self, mapping: dict) -> None:
+        """ Relabel several surfaces at once.
+
+        Convenience wrapper around relabel_surface for the common case of
+        renaming many gate surfaces with no boundary conditions, e.g.
+
+            dG.relabel_surfaces({'surf1': 'top_gate', 'surf2': 'back_gate'})
+
+        Args:
+            mapping (dictionary): maps the current label of each surface to
+                its new label.
+        """
+        for old_label, new_label in mapping.items():
+            self.relabel_surface(old_label, new_label)
 
     def split_surface(self, name: str) -> None:
         """ Splits a physical surface into seperate physical surfaces for each
@@ -775,6 +1096,7 @@ class DeviceGenerator:
         Args:
             name (string): name of physical surface to split.
         """
+        self._ensure_top_layer()
         # Entities associated with name
         ents = self.get_ent_tag_from_name(name)
         if len(ents) == 1:
@@ -784,20 +1106,25 @@ class DeviceGenerator:
         gmsh.model.removePhysicalGroups(dimTags=[(2, phys_tag)])
         gmsh.model.removePhysicalName(name)
 
-        # Set new physical groups and names
-        for i, ent in enumerate(ents):
-            tag = gmsh.model.addPhysicalGroup(2, [ent])
+        # Set new physical groups and names. The groups are added in a single
+        # pass and named from the returned tags.
+        new_tags = [gmsh.model.addPhysicalGroup(2, [ent]) for ent in ents]
+        for i, (ent, tag) in enumerate(zip(ents, new_tags)):
             # Set the new name
             new_name = f'{name}-{i}'
             gmsh.model.setPhysicalName(2, tag, new_name)
-            self.vol_entities[new_name] = [[(2, ent)]]
-            self.vol_entities_top[new_name] = [[(2, ent)]]
+            # Both stacks share the read-only layer list
+            layer = [ent]
+            self.vol_entities[new_name] = LayerStack(surfaces=[layer])
+            self.vol_entities_top[new_name] = LayerStack(surfaces=[layer])
 
 
         # Update self.vol_entities
         self.vol_entities.pop(name, None)
         self.vol_entities_top.pop(name, None)
 
+        self._invalidate_phys_cache()
+
 
     def _update_vol_entity_keys(
             self, ent_tags: list, old_label: str, new_label: str
@@ -815,14 +1142,16 @@ class DeviceGenerator:
         if isinstance(old_label, str):
             old_label = [old_label]
         # Remove old physical names from model and attribute
+        remove_phys_name = gmsh.model.removePhysicalName
         for label in old_label:
-            gmsh.model.removePhysicalName(label)
+            remove_phys_name(label)
             self.vol_entities.pop(label, None)
-        # Update attribute
-        self.vol_entities[new_label] = []
-        self.vol_entities[new_label].append([(2,e) for e in ent_tags])
-        self.vol_entities_top[new_label] = []
-        self.vol_entities_top[new_label].append([(2,e) for e in ent_tags])
+        self._invalidate_phys_cache()
+        # Update attribute. The tag list is built once; the inner list is
+        # only ever read, so the two stacks can share it.
+        layer = list(ent_tags)
+        self.vol_entities[new_label] = LayerStack(surfaces=[layer])
+        self.vol_entities_top[new_label] = LayerStack(surfaces=[layer])
 
     def remove_phys_groups(self, label) -> None:
         """ Remove physical groups from the model.
@@ -834,16 +1163,18 @@ class DeviceGenerator:
         if isinstance(label, str):
             label = [label]
 
-        # Get physical tags
-        phys_tags = self.get_tag_from_name(label)
-        if isinstance(phys_tags, int):
-            phys_tags = [phys_tags]
-        phys_tags = [(2, p) for p in phys_tags]
-        # Remove names 
+        # Resolve the physical tags and remove the names in a single pass.
+        # gmsh keeps physical names in a separate registry, so removing the
+        # groups does not drop the names and both calls are needed.
+        name_to_tag = self._phys_name_map(2)
+        phys_tags = []
         for l in label:
+            if l in name_to_tag:
+                phys_tags.append((2, name_to_tag[l]))
             gmsh.model.removePhysicalName(l)
-        # Remove groups
+        # Remove groups in one batched call
         gmsh.model.removePhysicalGroups(phys_tags)
+        self._invalidate_phys_cache()
 
     def new_dot_rectangle(
             self, x: float, y: float, dx: float, dy: float, h=None
@@ -867,20 +1198,27 @@ class DeviceGenerator:
         
         """
 
+        # Fail fast here: the deferred rebuild would otherwise surface this
+        # error from an unrelated later call (see _ensure_top_layer)
+        if not self.first_layer:
+            raise ValueError(
+                'Dot rectangles must be added before any layer is created')
+
         # # Using gmsh python API to create rectangle
         surf = gmsh.model.occ.addRectangle(x, y, 0, dx, dy)
+        self._needs_sync = True
         # refine mesh in dot region
         if h is not None:
             self.new_box_field(x, x+dx, y, y+dy, h)
-        # Allow entities to be accessed outside model
-        gmsh.model.occ.synchronize()
-        
+
+
         # Keep track of dot tags
         self.dot_tag.append([[surf]])
         self.dot_volume.append([])
 
-        # Reset top layer
-        self.setup_top_layer()
+        # Defer the top-layer rebuild: consecutive dot rectangles then cost a
+        # single fragmentation instead of one each (see _ensure_top_layer)
+        self._top_stale = True
 
         # Increase count
         self.dot_counter += 1
@@ -900,9 +1238,10 @@ class DeviceGenerator:
         if isinstance(surfs,str):
             surfs = [surfs]
 
+        self._ensure_top_layer()
         # Allow entities to be accessed outside model
-        gmsh.model.occ.synchronize()
-        
+        self._synchronize()
+
         # Get list of surface entity indices from physical surfaces
         self.dot_tag = []
         surf_entities = []
@@ -912,18 +1251,16 @@ class DeviceGenerator:
                 self.dot_tag.append([[surf]])
                 surf_entities.append(surf)
         
-        # refine mesh in dot region
+        # refine mesh in dot region. Defining a mesh field does not modify
+        # the geometry, so no synchronization is needed afterwards.
         if h is not None:
             self.new_constant_field(surf_entities, h)
-        # Allow entities to be accessed outside model
-        gmsh.model.occ.synchronize()
 
         # Set number of quantum dots
         self.dot_counter = len(surfs)
         
         # Update dot volumes
-        for _ in range(self.dot_counter):
-            self.dot_volume.append([])
+        self.dot_volume.extend([] for _ in range(self.dot_counter))
 
         # Reset top layer
         self.setup_top_layer()
@@ -982,64 +1319,76 @@ class DeviceGenerator:
             (list): List of names
         
         """
-        
-        # Get all the physical groups of a given dimension
-        phys_groups = gmsh.model.getPhysicalGroups(dim)
-        # Get all the names for the groups of the given dimension
-        phys_names = []
-        for pg in phys_groups: # Loop through the groups.
-            name = gmsh.model.getPhysicalName(dim, pg[1])
-            phys_names.append(name)
-        
-        return phys_names
+        self._ensure_top_layer()
+        # Read from the cached name map, which is invalidated whenever
+        # physical groups change, instead of re-querying every group
+        return list(self._phys_name_map(dim))
 
-    def _label_surfaces(self) -> None:
+    def _label_surfaces(self, entities: list=None) -> None:
         """ Gives generic name to all surfaces generated from the layout file
+
+        Args:
+            entities (list): Surface entities to label. If None, all surface
+                entities of the model are labelled.
         """
         # Initialize attribute that keeps track of volume entities
         self.vol_entities = {}
         self.vol_entities_top = {}
 
         # Get all entities
-        entities = gmsh.model.getEntities(2)
+        self._synchronize()
+        if entities is None:
+            entities = gmsh.model.getEntities(2)
         # Loop over all entities and assign a generic name: 'surf1', 'surf2', ...
+        # The physical tags are pre-assigned from the surface counter so that
+        # no intermediate tag lookups are needed between the calls, and the
+        # gmsh setters and target dicts are bound locally for the loop.
+        add_phys_group = gmsh.model.addPhysicalGroup
+        set_phys_name = gmsh.model.setPhysicalName
+        vol_entities = self.vol_entities
+        vol_entities_top = self.vol_entities_top
+        s_counter = self.s_counter
         for e in entities:
-            name = f'surf{self.s_counter}'
-            phys_surf = gmsh.model.addPhysicalGroup(2, [e[1]])
-            gmsh.model.setPhysicalName(2, phys_surf, name)
+            name = f'surf{s_counter}'
+            add_phys_group(2, [e[1]], tag=s_counter)
+            set_phys_name(2, s_counter, name)
 
-            self.vol_entities[name] = [[e]]
-            self.vol_entities_top[name] = [[e]]
+            # Both stacks share the read-only layer list
+            layer = [e[1]]
+            vol_entities[name] = LayerStack(surfaces=[layer])
+            vol_entities_top[name] = LayerStack(surfaces=[layer])
 
-            self.s_counter += 1
+            s_counter += 1
+        self.s_counter = s_counter
 
-            gmsh.model.occ.synchronize()
+        self._invalidate_phys_cache()
 
-    def _update_dot_frag(self, surf: list, frag_surf: list) -> None:
-        """ Updates the dot_tag attribute if any dot rectangle overlaps with 
-        another region. 
+    def _update_dot_frag(self, surf: list, frag_map: list) -> None:
+        """ Updates the dot_tag attribute if any dot rectangle overlaps with
+        another region.
 
         Args:
             surf (list of entity tags): Entity tags before a boolean fragment.
-            frag_surf (List of list of entity tags): The output of the
-                gmsh.model.occ.fragment method which was applied on the top 
-                surface 
+            frag_map (list of lists of entities): Map from the entities given
+                to gmsh.model.occ.fragment to the entities they produced (the
+                second return value of the fragment call).
         """
         
-        # For all dots being tracked
+        # Invert the tracked dot tags once: entity tag -> dot indices
+        tag_to_dots = {}
         for j, dot in enumerate(self.dot_tag):
-            # entity tags for the top layer
-            tags = dot[0]
-            # Get all indices of the dot tags before the boolean fragment
-            indices = []
-            for i, s in enumerate(surf):
-                if s[1] in tags:
-                    indices.append(i)
-            # Get the new entity tags after the boolean fragment
-            new = []
-            for index in indices:
-                new += [s[1] for s in frag_surf[1][index]]
-            # Update the dot_tag attribute
+            for tag in dot[0]:
+                tag_to_dots.setdefault(tag, []).append(j)
+
+        # Single pass over the pre-fragment surfaces, accumulating the
+        # entities each dot surface was fragmented into
+        new_tags = [[] for _ in self.dot_tag]
+        for i, s in enumerate(surf):
+            for j in tag_to_dots.get(s[1], ()):
+                new_tags[j].extend(e[1] for e in frag_map[i])
+
+        # Update the dot_tag attribute
+        for j, new in enumerate(new_tags):
             self.dot_tag[j] = [new]
 
     def setup_top_layer(self) -> None:
@@ -1049,11 +1398,15 @@ class DeviceGenerator:
         if not self.first_layer:
             raise ValueError('Must setup top layer before adding new layers')
 
+        self._top_stale = False
+        self._synchronize()
+
         # Remove all physical groups and names from the model
         names = self.get_names(2)
         for name in names:
             gmsh.model.removePhysicalName(name)
         gmsh.model.removePhysicalGroups(dimTags=[])
+        self._invalidate_phys_cache()
 
         # Reset surface counter
         self.s_counter = 1 
@@ -1062,28 +1415,51 @@ class DeviceGenerator:
         surfaces = gmsh.model.getEntities(2)
         surf1 = surfaces[:1]
         surf2 = surfaces[1:]
-        # Use Bolean fragments
-        frag_surf = gmsh.model.occ.fragment(surf1, surf2)
-        gmsh.model.occ.synchronize()
-        
+        # Use Bolean fragments. The fragment call already returns the
+        # resulting surfaces, so there is no need to poll getEntities again;
+        # sort them by tag to keep the generic surface names deterministic.
+        out_tags, out_map = gmsh.model.occ.fragment(surf1, surf2)
+        out_tags = sorted(out_tags)
+        self._needs_sync = True
+
         # Update dot tags
-        self._update_dot_frag(surfaces, frag_surf)
+        self._update_dot_frag(surfaces, out_map)
 
         # store top and bottom surfaces as a device attribute
         # Only the layout is currently set: the top and bottom surfaces are the
         # same
-        self.bottom_surface = copy.deepcopy(gmsh.model.getEntities(2))
-        self.top_surface = copy.deepcopy(gmsh.model.getEntities(2))
+        self.bottom_surface = list(out_tags)
+        self.top_surface = list(out_tags)
 
         # Label surfaces
-        self._label_surfaces()
-        
-        # Synchronize
-        gmsh.model.occ.synchronize()
+        self._label_surfaces(out_tags)
+
+    def _configure_gmsh(self, options: dict) -> None:
+        """ Set gmsh numeric options from a dictionary.
+
+        Args:
+            options (dictionary): Map from gmsh option names to the numeric
+                values to set.
+        """
+        set_number = gmsh.option.setNumber
+        for option, value in options.items():
+            set_number(option, value)
+
+    # When True, view() returns without opening the GUI. Lets headless or
+    # batch runs reuse interactive scripts unchanged.
+    headless = False
 
-    def view(self) -> None:
+    def view(self, force: bool=False) -> None:
         """ Open gmsh GUI to visualize.
+
+        Args:
+            force (boolean): If True, open the GUI even when the class-level
+                headless flag is set.
         """
+        if DeviceGenerator.headless and not force:
+            return
+        self._ensure_top_layer()
+        self._synchronize()
         gmsh.fltk.run()
 
     def __init__(
@@ -1115,41 +1491,66 @@ class DeviceGenerator:
         self.s_counter = 1 # surfaces
         self.dot_counter = 1 # dots
         self.field_counter = 1 # fields
+        # Tags of the size-producing fields combined by min_field
+        self._size_fields = []
 
-        # Initializing attributes used for creating dots. 
+        # Initializing attributes used for creating dots.
         self.dot_tag = [] # entity tag for bottom most layer of dot surface
         self.dot_volume = [] # volumes making up dots
-
-        # Parsing input file 
+        # Flat set of all dot volume tags, updated as dot_volume grows
+        self._flat_dot_vol = set()
+
+        # Cache for physical name to physical tag lookups (see _phys_name_map)
+        self._phys_name_cache = {}
+        # Cache for physical group to entity tag lookups (see _ents_for_group)
+        self._group_ents_cache = {}
+        # Cache for entity to physical group lookups (see _entity_phys_map)
+        self._ent_phys_cache = {}
+        # Whether OCC geometry changes are pending a synchronize call
+        # (see _synchronize)
+        self._needs_sync = False
+        # Whether a mesh has been generated for this model
+        self._mesh_generated = False
+        # Whether the top layer must be rebuilt after new dot rectangles
+        # (see _ensure_top_layer)
+        self._top_stale = False
+
+        # Parsing input file
+        ext = os.path.splitext(file_path)[1].lower()
         # .gds/.txt files
-        if file_path[-4:] == '.gds' or file_path[-4:] == '.txt':
+        if ext in ('.gds', '.txt'):
             P = Parser(file_path, outfile, h)
             P.parse()
             geo_file = outfile
         # .geo files
-        elif file_path.split(".")[-1] in ["geo", "geo_unrolled"]:
+        elif ext in ('.geo', '.geo_unrolled'):
             geo_file = file_path
-        
+        else:
+            raise ValueError(f"Unsupported layout file format: {file_path}")
+
         # Dictionary used to store material properties and boundary conditions 
         # of a generated device
         self.material_dict = {}
         self.bnd_dict = {}
 
-        # Initializing the gmsh kernel
-        gmsh.initialize()
-        # Print gmsh outputs to terminal or not
-        gmsh.option.setNumber("General.Terminal", int(to_terminal))
-        # Set up layout and min mesh size
-        gmsh.option.setNumber('Mesh.MeshSizeMax', h)
-        # Additional Options
-        # Turn off otimization related to boolean transforms - elimantes issues
-        # related to conformal meshes introduced in gmsh 4.10 
-        # (see e.g. https://gitlab.onelab.info/gmsh/gmsh/-/issues/1928)
-        gmsh.option.setNumber('Geometry.OCCFastUnbind', 0)  
+        # Initializing the gmsh kernel, unless an enclosing gmsh_session (or
+        # an earlier generator) already started one
+        if not gmsh.isInitialized():
+            gmsh.initialize()
+        self._configure_gmsh({
+            # Print gmsh outputs to terminal or not
+            'General.Terminal': 1 if to_terminal else 0,
+            # Set up layout and min mesh size
+            'Mesh.MeshSizeMax': h,
+            # Turn off otimization related to boolean transforms - elimantes
+            # issues related to conformal meshes introduced in gmsh 4.10
+            # (see e.g. https://gitlab.onelab.info/gmsh/gmsh/-/issues/1928)
+            'Geometry.OCCFastUnbind': 0,
+            })
 
         # Load file
         gmsh.open(geo_file)
-        gmsh.model.occ.synchronize()
-        
+        self._needs_sync = True
+
         # Setup top layer
         self.setup_top_layer()    
\ No newline at end of file
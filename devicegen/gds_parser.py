@@ -1,6 +1,3 @@
-def remove_prefix(text, prefix):
-    return text[text.startswith(prefix) and len(prefix):]
-
 class Parser:
     """ Class to generate a .geo file corresponding to a given .gds file
     Attributes:
@@ -41,9 +38,11 @@ class Parser:
         # remove new line at end of string
         y = point[ix+1:-1]
 
-        # # nm units
-        x = str(round(float(x) * self.units_m * 1e6, 6))
-        y = str(round(float(y) * self.units_m * 1e6, 6))
+        # # nm units. The scale factor is computed once when the header is
+        # parsed rather than once per coordinate.
+        scale = self.scale
+        x = str(round(float(x) * scale, 6))
+        y = str(round(float(y) * scale, 6))
         
         # Output string for .geo file
         pt_str = f'Point({self.pt_counter}) = {{{x}, {y}, 0, {self.h}}}; \n'
@@ -63,38 +62,40 @@ class Parser:
         
         """
         
+        # Buffer the element's output and write it in a single call rather
+        # than one write per generated Line/Loop/Surface
+        buf = []
+        buf_append = buf.append
+
         # First line created in element
         line_checkpoint = self.line_counter
-        # loop over all points of element and create lines between them
-        for n in range(checkpoint, self.pt_counter - 1):
-            line_str = f'Line({self.line_counter}) = {{{n}, {n+1}}}; \n'
-            outfile.write(line_str)
-            self.line_counter += 1
-        # Link the las point to the first to have a closed element.
+        # loop over all points of element and create lines between
+        # consecutive points, wrapping the last point back to the first so
+        # the closing line needs no special case after the loop
         last_pt = self.pt_counter - 1
-        first_pt = checkpoint
-
-        loop_close = f'Line({self.line_counter}) = {{{last_pt}, {first_pt}}}; \n'
-        outfile.write(loop_close)
-        self.line_counter += 1 
-
-        # Create Curve Loop
-        line_numbers = [str(n) for n in range(line_checkpoint, self.line_counter)]
-        loop = ', '.join(line_numbers)
-        curve_loop_str = f'Curve Loop({self.cl_counter}) = {{{loop}}};\n'
-        outfile.write(curve_loop_str)
+        line_counter = self.line_counter
+        for n in range(checkpoint, last_pt + 1):
+            m = n + 1 if n < last_pt else checkpoint
+            buf_append(f'Line({line_counter}) = {{{n}, {m}}}; \n')
+            line_counter += 1
+        self.line_counter = line_counter
+
+        # Create Curve Loop. map feeds join directly, with no intermediate
+        # list of number strings.
+        loop = ', '.join(map(str, range(line_checkpoint, self.line_counter)))
+        buf_append(f'Curve Loop({self.cl_counter}) = {{{loop}}};\n')
 
         # Store index for curve loops of different layers
         # (will be used to perform Boolean fragments when creating surfaces)
         self.layers[layer].append(self.cl_counter)
 
-        # Creating surfaces. 
-        surface_str = f'Plane Surface({self.surf_counter}) = {{{self.cl_counter}}};\n'
-        outfile.write(surface_str)
+        # Creating surfaces.
+        buf_append(f'Plane Surface({self.surf_counter}) = {{{self.cl_counter}}};\n')
         self.cl_counter += 1
         self.surf_counter += 1
 
-        outfile.write('\n')
+        buf_append('\n')
+        outfile.write(''.join(buf))
 
     def _create_surfaces(self, outfile):
         """ Create surfaces from Boolean fragments
@@ -121,29 +122,33 @@ class Parser:
         o (string): path to output .geo file      
         """
         for line in f:
+            # A line holds at most one record type, so dispatch with elif
+            # rather than testing every prefix on every line
             if line.startswith("LAYER"):
                 layer = line[-3]
 
                 if layer not in self.layers:
                     self.layers[layer] = []
 
-            if line.startswith("XY"):
+            elif line.startswith("XY"):
                 # Remove "XY" prefix
-                l = remove_prefix(line, "XY ")
+                l = line.removeprefix("XY ")
                 # Checkpoint for point counter
                 count_checkpoint = self.pt_counter
-                # Write first line to file
-                o.write(self.format_point(l))
+                # Buffer the element's points and write them in one call
+                buf = [self.format_point(l)]
+                buf_append = buf.append
                 # Update counter (point ids)
                 self.pt_counter += 1
                 for line in f:
                     if line.startswith("ENDEL"):
-                        o.write('\n')
+                        buf_append('\n')
+                        o.write(''.join(buf))
                         self._create_elements(count_checkpoint, o, layer)
                         # stop this inner for loop; outer loop picks up on the next line
-                        break 
+                        break
                     if line != l:
-                        o.write(self.format_point(line))
+                        buf_append(self.format_point(line))
                         self.pt_counter += 1
 
 
@@ -162,13 +167,15 @@ class Parser:
 
         for line in f:
             if line.startswith("UNITS"):
-                scaling = remove_prefix(line, "UNITS ").split()
+                scaling = line.removeprefix("UNITS ").split()
                 break
        
         # Extract units from .gds header
         self.units_mum = float(scaling[0])
         self.units_m = float(scaling[1])
-        
+        # Conversion factor applied to every coordinate (see format_point)
+        self.scale = self.units_m * 1e6
+
         if self.units_mum != (self.units_m * 1e6):
             ValueError('Units do not match')
 
@@ -179,14 +186,20 @@ class Parser:
         if verbose:
             print(f"parsing {self.file_path}...")
 
-        # Open .txt (gds2) file
-        f = open(self.file_path, 'r')
-        # Open .geo file
-        o = open(self.outfile, 'w')
+        # Read the .txt (gds2) file in a single pass. The layouts are ASCII
+        # dumps, so one read plus a C-level split is much cheaper than going
+        # through the text-I/O layer once per line. The iterator preserves
+        # the shared-cursor semantics the nested parsing loops rely on.
+        with open(self.file_path, 'r', buffering=1<<20) as f:
+            lines = iter(f.read().splitlines(keepends=True))
+
+        # Open .geo file with a large buffer so the batched element writes
+        # are coalesced into few syscalls
+        o = open(self.outfile, 'w', buffering=1<<20)
 
-        self._create_header(f, o)
+        self._create_header(lines, o)
 
-        self._parse_points(f, o)
+        self._parse_points(lines, o)
 
         o.close()
 
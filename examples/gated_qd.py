@@ -1,87 +1,121 @@
-from devicegen import DeviceGenerator
-import pathlib
-
-# Constants
-## Mesh characteristic lengths
-char_len = 15 * 1e-3
-dot_char_len = char_len/2
-
-## z dimensions
-### Thickness of each material layer
-cap_thick = 10 * 1e-3
-barrier_thick = 25 * 1e-3
-dopant_thick = 5 * 1e-3
-spacer_thick = 5 * 1e-3
-two_deg_thick = 5 * 1e-3
-substrate_thick = 100 * 1e-3 - two_deg_thick
-top_layer_thick = 10e-3
-
-### Number of mesh points along growth axis
-cap_layers = 5
-barrier_layers = 5
-dopant_layers = 10
-spacer_layers = 10
-two_deg_layers = 10
-substrate_layers = 10
-top_layers = 10
-
-# Initializing the DeviceGenerator
-path = pathlib.Path(__file__).parent.resolve()
-file = str(path/'layouts/gated_qd.txt')
-outfile=str(path/'layouts/gated_qd.geo')
-dG = DeviceGenerator(file, outfile=outfile, h=char_len)
-
-# Display layout
-dG.view()
-
-# Dot rectangle coordinates in microns
-dot_xmin = 0.16900;  dot_ymin = 0.23100
-dot_len_x = 0.131; dot_len_y = 0.197
-dG.new_dot_rectangle(dot_xmin, dot_ymin, dot_len_x, dot_len_y, 
-    h=dot_char_len)
-
-# Display layout with dot region
-dG.view()
-
-# Relabelling surfaces
-print('Relabelling surfaces...')
-dG.relabel_surface('surf2', 'top_gate_1')
-dG.relabel_surface('surf3', 'top_gate_2')
-dG.relabel_surface('surf1', 'top_gate_3')
-dG.relabel_surface('surf6', 'bottom_gate_1')
-dG.relabel_surface('surf4', 'bottom_gate_2')
-dG.relabel_surface('surf5', 'bottom_gate_3')
-
-# Display layout with relabelled surfaces
-dG.view()
-
-# Heterostructure stack
-print('Setting up heterostructure stack...')
-dG.new_layer(cap_thick, cap_layers, label='cap')
-dG.new_layer(barrier_thick-dopant_thick-spacer_thick, barrier_layers, label='barrier')
-dG.new_layer(dopant_thick, dopant_layers, label='dopant_layer')
-dG.new_layer(spacer_thick, spacer_layers, label='spacer_layer', 
-    dot_region=True, dot_label="spacer_dot")
-dG.new_layer(two_deg_thick, two_deg_layers, label='two_deg',
-    dot_region=True, dot_label="two_deg_dot")
-dG.new_layer(substrate_thick, substrate_layers, label='substrate', 
-    dot_region=True, dot_label="substrate_dot")
-
-# Display heterostructure stack
-dG.view()
-print('Setting up back gate...')
-
-# Back gate
-dG.label_bottom('back_gate')
-dG.view()
-
-# Top gate
-dG.new_top_layer(
-    top_layer_thick, npts=top_layers, bnd_label='top_gate', label='top'
-    )
-
-# Display final layout
-dG.view()
-
-# Save mesh
-dG.save_mesh(mesh_name = str(path/'meshes/gated_dot.msh2'))
\ No newline at end of file
+from devicegen import DeviceGenerator
+import hashlib
+import os
+import pathlib
+import shutil
+import sys
+
+# Only open the gmsh GUI when explicitly requested; headless/batch runs
+# then skip all rendering, which otherwise dominates the wallclock time
+INTERACTIVE = os.environ.get("DEVICEGEN_VIEW") == "1"
+
+# Constants
+## Mesh characteristic lengths
+char_len = 15 * 1e-3
+dot_char_len = char_len/2
+
+## z dimensions
+### Thickness of each material layer
+cap_thick = 10 * 1e-3
+barrier_thick = 25 * 1e-3
+dopant_thick = 5 * 1e-3
+spacer_thick = 5 * 1e-3
+two_deg_thick = 5 * 1e-3
+substrate_thick = 100 * 1e-3 - two_deg_thick
+top_layer_thick = 10e-3
+
+### Number of mesh points along growth axis
+cap_layers = 5
+barrier_layers = 5
+dopant_layers = 10
+spacer_layers = 10
+two_deg_layers = 10
+substrate_layers = 10
+top_layers = 10
+
+## Dot rectangle coordinates in microns
+dot_xmin = 0.16900;  dot_ymin = 0.23100
+dot_len_x = 0.131; dot_len_y = 0.197
+
+path = pathlib.Path(__file__).parent.resolve()
+file = str(path/'layouts/gated_qd.txt')
+outfile = str(path/'layouts/gated_qd.geo')
+mesh_name = str(path/'meshes/gated_dot.msh2')
+
+# Mesh cache: the mesh only depends on the layout file and the constants
+# above, so hash them and reuse a previously generated mesh when nothing
+# has changed. Hashing is microseconds; meshing is seconds to minutes.
+params = (char_len, dot_char_len, cap_thick, barrier_thick, dopant_thick,
+    spacer_thick, two_deg_thick, substrate_thick, top_layer_thick,
+    cap_layers, barrier_layers, dopant_layers, spacer_layers,
+    two_deg_layers, substrate_layers, top_layers,
+    dot_xmin, dot_ymin, dot_len_x, dot_len_y)
+with open(file, 'rb') as layout:
+    key = hashlib.blake2b(
+        layout.read() + repr(params).encode()).hexdigest()[:16]
+cached_mesh = path/'meshes'/f'gated_dot.{key}.msh2'
+if cached_mesh.exists():
+    print(f'Reusing cached mesh {cached_mesh.name}...')
+    shutil.copyfile(cached_mesh, mesh_name)
+    sys.exit()
+
+# Initializing the DeviceGenerator
+dG = DeviceGenerator(file, outfile=outfile, h=char_len)
+
+# Display layout
+if INTERACTIVE: dG.view()
+
+dG.new_dot_rectangle(dot_xmin, dot_ymin, dot_len_x, dot_len_y, 
+    h=dot_char_len)
+
+# Display layout with dot region
+if INTERACTIVE: dG.view()
+
+# Relabelling surfaces
+print('Relabelling surfaces...')
+dG.relabel_surfaces({
+    'surf2': 'top_gate_1',
+    'surf3': 'top_gate_2',
+    'surf1': 'top_gate_3',
+    'surf6': 'bottom_gate_1',
+    'surf4': 'bottom_gate_2',
+    'surf5': 'bottom_gate_3',
+    })
+
+# Display layout with relabelled surfaces
+if INTERACTIVE: dG.view()
+
+# Heterostructure stack, built in a single batch call
+print('Setting up heterostructure stack...')
+dG.new_layers([
+    dict(thickness=cap_thick, npts=cap_layers, label='cap'),
+    dict(thickness=barrier_thick-dopant_thick-spacer_thick,
+        npts=barrier_layers, label='barrier'),
+    dict(thickness=dopant_thick, npts=dopant_layers, label='dopant_layer'),
+    dict(thickness=spacer_thick, npts=spacer_layers, label='spacer_layer',
+        dot_region=True, dot_label="spacer_dot"),
+    dict(thickness=two_deg_thick, npts=two_deg_layers, label='two_deg',
+        dot_region=True, dot_label="two_deg_dot"),
+    dict(thickness=substrate_thick, npts=substrate_layers, label='substrate',
+        dot_region=True, dot_label="substrate_dot"),
+    ])
+
+# Display heterostructure stack
+if INTERACTIVE: dG.view()
+print('Setting up back gate...')
+
+# Back gate
+dG.label_bottom('back_gate')
+if INTERACTIVE: dG.view()
+
+# Top gate
+dG.new_top_layer(
+    top_layer_thick, npts=top_layers, bnd_label='top_gate', label='top'
+    )
+
+# Display final layout
+if INTERACTIVE: dG.view()
+
+# Save mesh and store a copy under its content hash for later reuse
+dG.save_mesh(mesh_name=mesh_name)
+shutil.copyfile(mesh_name, cached_mesh)
\ No newline at end of file